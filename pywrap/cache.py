@@ -0,0 +1,158 @@
+import os
+import hashlib
+import pickle
+import tempfile
+import time
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pywrap")
+# Entries that have been written more than 30 days ago will be removed
+MAX_AGE = 30 * 24 * 60 * 60
+
+
+def cache_key(*parts):
+    """Compute a content-addressed key.
+
+    Parameters
+    ----------
+    parts : list
+        Strings (or bytes) that identify the cached object, e.g. the content
+        of a header, the clang version and the include directories
+
+    Returns
+    -------
+    key : str
+        SHA-256 hex digest of all parts
+    """
+    sha = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = str(part).encode("utf-8")
+        sha.update(part)
+        # separator, otherwise ("ab", "c") and ("a", "bc") would collide
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def load_cached(cache_dir, key, source_files=()):
+    """Load a cached object.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Cache directory
+
+    key : str
+        Key of the cached object, see cache_key()
+
+    source_files : list, optional
+        The entry is considered outdated if any of these files has been
+        modified after the entry has been written.
+
+    Returns
+    -------
+    entry : object or None
+        Cached object or None if there is no valid entry
+    """
+    filename = _cache_filename(cache_dir, key)
+    if not os.path.exists(filename):
+        return None
+
+    mtime = os.path.getmtime(filename)
+    for source_file in source_files:
+        if os.path.exists(source_file) and os.path.getmtime(source_file) > mtime:
+            return None
+
+    try:
+        with open(filename, "rb") as f:
+            digests, entry = pickle.load(f)
+    except Exception:
+        # corrupted or incompatible entry, we will just overwrite it
+        return None
+
+    for dependency, digest in digests.items():
+        if _file_digest(dependency) != digest:
+            return None
+    return entry
+
+
+def store_cached(cache_dir, key, entry, dependencies=()):
+    """Store an object in the cache.
+
+    The file is written atomically, i.e. concurrent processes will either see
+    the complete entry or no entry at all.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Cache directory, will be created if it does not exist
+
+    key : str
+        Key of the cached object, see cache_key()
+
+    entry : object
+        Picklable object
+
+    dependencies : list, optional
+        Files that have been read to create the entry, e.g. included headers.
+        The entry is considered outdated if the content of any of these files
+        changes.
+    """
+    digests = dict((dependency, _file_digest(dependency))
+                   for dependency in dependencies)
+
+    if not os.path.exists(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            if not os.path.isdir(cache_dir):
+                raise
+
+    fd, tmp_filename = tempfile.mkstemp(suffix=".tmp", dir=cache_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((digests, entry), f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_filename, _cache_filename(cache_dir, key))
+    except Exception:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+
+    prune_cache(cache_dir)
+
+
+def prune_cache(cache_dir, max_age=MAX_AGE):
+    """Remove old entries from the cache.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Cache directory
+
+    max_age : float, optional (default: 30 days)
+        Maximum age of an entry in seconds
+    """
+    oldest = time.time() - max_age
+    for filename in os.listdir(cache_dir):
+        if not filename.endswith(".pkl"):
+            continue
+        filename = os.path.join(cache_dir, filename)
+        try:
+            if os.path.getmtime(filename) < oldest:
+                os.remove(filename)
+        except OSError:
+            # removed by another process in the meantime
+            pass
+
+
+def _cache_filename(cache_dir, key):
+    return os.path.join(cache_dir, key + ".pkl")
+
+
+def _file_digest(filename):
+    try:
+        with open(filename, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except (IOError, OSError):
+        # the file has been removed
+        return None
@@ -1,8 +1,11 @@
 import os
 import sys
+import runpy
+import traceback
+from .cache import DEFAULT_CACHE_DIR
 from .defaultconfig import Config
 from .exporter import CythonDeclarationExporter, CythonImplementationExporter
-from .parser import Parser, Includes, TypeInfo
+from .parser import MultiFileParser, Includes, TypeInfo, parse_in_parallel
 from .ast import postprocess_asts
 from .templates import render
 from .utils import make_header, file_ending, hidden_stdout, hidden_stderr
@@ -36,7 +39,7 @@ def load_config(custom_config):
 
 def make_cython_wrapper(filenames, sources, modulename=None, target=".",
                         config=Config(), incdirs=(), compiler_flags=("-O3",),
-                        verbose=0):
+                        verbose=0, cache_dir=DEFAULT_CACHE_DIR, n_jobs=1):
     """Make Cython wrapper for C++ files.
 
     Parameters
@@ -66,6 +69,15 @@ def make_cython_wrapper(filenames, sources, modulename=None, target=".",
     verbose : int, optional (default: 0)
         Verbosity level
 
+    cache_dir : str, optional (default: ~/.cache/pywrap)
+        Directory in which parsed headers will be cached, None disables the
+        cache
+
+    n_jobs : int, optional (default: 1)
+        Number of processes that parse the headers. With one process all
+        headers will be parsed together by clang, otherwise each header will
+        be parsed separately. -1 means that we use one process per CPU.
+
     Returns
     -------
     results : dict
@@ -79,6 +91,10 @@ def make_cython_wrapper(filenames, sources, modulename=None, target=".",
         raise ValueError("Please give a module name when there are multiple "
                          "C++ files that you want to wrap.")
 
+    if n_jobs != -1 and n_jobs < 1:
+        raise ValueError("Number of jobs must be positive or -1, got %d."
+                         % n_jobs)
+
     for incdir in incdirs:
         if not os.path.exists(incdir):
             raise ValueError("Include directory '%s' does not exist." % incdir)
@@ -91,7 +107,7 @@ def make_cython_wrapper(filenames, sources, modulename=None, target=".",
             raise ValueError("File '%s' does not exist" % filename)
 
     includes, type_info, asts = _parse_files(
-        filenames, config, incdirs, verbose)
+        filenames, config, incdirs, verbose, cache_dir, n_jobs)
 
     postprocess_asts(asts)
 
@@ -115,13 +131,17 @@ def _derive_module_name_from(filename):
     return filename.split(".")[0]
 
 
-def _parse_files(filenames, config, incdirs, verbose):
+def _parse_files(filenames, config, incdirs, verbose, cache_dir, n_jobs):
     includes = Includes()
     type_info = TypeInfo(config)
-    asts = []
-    for filename in filenames:
-        parser = Parser(filename, includes, type_info, incdirs, verbose)
-        asts.append(parser.parse())
+    if n_jobs == 1 or len(filenames) == 1:
+        parser = MultiFileParser(filenames, includes, type_info, incdirs,
+                                 verbose, cache_dir)
+        asts = parser.parse()
+    else:
+        asts = parse_in_parallel(
+            filenames, includes, type_info, incdirs, verbose, cache_dir,
+            None if n_jobs == -1 else n_jobs)
     return includes, type_info, asts
 
 
@@ -175,7 +195,7 @@ def write_files(files, target="."):
             f.write(content)
 
 
-def run_setup(setuppy_name="setup.py", hide_errors=False):
+def run_setup(setuppy_name="setup.py", hide_errors=False, in_process=False):
     """Run setup script to build extension.
 
     Parameters
@@ -185,11 +205,49 @@ def run_setup(setuppy_name="setup.py", hide_errors=False):
 
     hide_errors : bool, optional (default: False)
         Hide output to stderr
+
+    in_process : bool, optional (default: False)
+        Run the setup script in the current Python interpreter so that we do
+        not have to start Python and import Cython for each extension.
+        Otherwise, the setup script will be run in a separate process.
+        Global side effects of the setup script that are not restored
+        afterwards, e.g. imported modules, remain in the current interpreter.
     """
-    cmd = "python %s build_ext --inplace" % setuppy_name
     with hidden_stdout():
         if hide_errors:
             with hidden_stderr():
-                os.system(cmd)
+                _build_ext(setuppy_name, in_process)
         else:
-            os.system(cmd)
+            _build_ext(setuppy_name, in_process)
+
+
+def _build_ext(setuppy_name, in_process):
+    if not in_process:
+        os.system("python %s build_ext --inplace" % setuppy_name)
+        return
+
+    argv, stdout, stderr = sys.argv, sys.stdout, sys.stderr
+    # The generated setup script modifies environment variables
+    environ, cwd = dict(os.environ), os.getcwd()
+    sys.argv = [setuppy_name, "build_ext", "--inplace"]
+    # Write to the file descriptors like a subprocess would, they might have
+    # been redirected by hidden_stdout() and hidden_stderr().
+    sys.stdout = os.fdopen(os.dup(1), "w")
+    sys.stderr = os.fdopen(os.dup(2), "w")
+    try:
+        runpy.run_path(setuppy_name, run_name="__main__")
+    except SystemExit as e:
+        # distutils reports build errors as exit message, the interpreter
+        # would print it
+        if e.code is not None and not isinstance(e.code, int):
+            sys.stderr.write("%s%s" % (e.code, os.linesep))
+    except Exception:
+        # Like the subprocess, we report errors without raising them.
+        traceback.print_exc()
+    finally:
+        sys.stdout.close()
+        sys.stderr.close()
+        sys.argv, sys.stdout, sys.stderr = argv, stdout, stderr
+        os.environ.clear()
+        os.environ.update(environ)
+        os.chdir(cwd)
@@ -313,6 +313,9 @@ class CythonImplementationExporter(AstExporter):
         self.includes = includes
         self.type_info = type_info
         self.config = config
+        self.class_specializer = ClassSpecializer(config)
+        self.method_specializer = MethodSpecializer(config)
+        self.function_specializer = FunctionSpecializer(config)
 
     def visit_ast(self, ast):
         self.output = render("definitions", enums=self.enums,
@@ -362,8 +365,7 @@ class CythonImplementationExporter(AstExporter):
         self._clear_class()
 
     def visit_template_class(self, template_class):
-        specializer = ClassSpecializer(self.config)
-        for clazz in specializer.specialize(template_class):
+        for clazz in self.class_specializer.specialize(template_class):
             self.visit_clazz(clazz, cppname=clazz.get_cppname())
 
     def visit_field(self, field):
@@ -430,8 +432,7 @@ class CythonImplementationExporter(AstExporter):
             return ""
 
     def visit_template_method(self, template_method):
-        specializer = MethodSpecializer(self.config)
-        for method in specializer.specialize(template_method):
+        for method in self.method_specializer.specialize(template_method):
             self.visit_method(method, cppname=template_method.name)
 
     def visit_function(self, function, cppname=None):
@@ -445,8 +446,7 @@ class CythonImplementationExporter(AstExporter):
             function.ignored = True
 
     def visit_template_function(self, template_function):
-        specializer = FunctionSpecializer(self.config)
-        for method in specializer.specialize(template_function):
+        for method in self.function_specializer.specialize(template_function):
             self.visit_function(method, cppname=template_function.name)
 
     def visit_param(self, param):
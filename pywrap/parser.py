@@ -1,6 +1,11 @@
 from .defaultconfig import Config
 import warnings
 import os
+import re
+import ctypes
+import functools
+from . import __version__
+from .cache import DEFAULT_CACHE_DIR, cache_key, load_cached, store_cached
 from .libclang import cindex, CLANG_VERSION, CLANG_INCDIR
 from .type_conversion import cythontype_from_cpptype
 from .ast import (Ast, Enum, Typedef, Clazz, Function, TemplateClass,
@@ -9,6 +14,11 @@ from .ast import (Ast, Enum, Typedef, Clazz, Function, TemplateClass,
 from .utils import make_header, convert_to_docstring
 
 
+# Must be increased whenever the output of the parser changes so that ASTs
+# that have been cached by older versions will not be used.
+CACHE_FORMAT = 1
+
+
 class ClangError(Exception):
     def __init__(self, message, diagnostics):
         full_message = message
@@ -17,6 +27,11 @@ class ClangError(Exception):
         super(ClangError, self).__init__(full_message)
         self.errors = diagnostics
 
+    def __reduce__(self):
+        # Diagnostics cannot be pickled, but the message contains them.
+        # This is required to raise errors from other processes.
+        return ClangError, (str(self), [])
+
 
 class Includes:
     def __init__(self):
@@ -31,82 +46,107 @@ class Includes:
                     "set": False,
                     "stack": False}
         self.deref = False
+        # A type is part of a type name if the type name starts with it or
+        # if it is a template argument, e.g. 'vector[string]' or
+        # 'map[int, string]' require vector, map and string.
+        self._patterns = dict(
+            (t, re.compile(r"^%(t)s|<%(t)s[>,]|\[%(t)s[\],]|, %(t)s[>\]]"
+                           % {"t": re.escape(t)}))
+            for t in self.stl.keys())
+        self._seen = set()
 
     def add_include_for(self, tname):
-        for t in self.stl.keys():
-            if self._part_of_tname(tname, t):
+        if tname in self._seen:
+            return
+        self._seen.add(tname)
+        for t, pattern in self._patterns.items():
+            if not self.stl[t] and pattern.search(tname):
                 self.stl[t] = True
 
+    def merge(self, other):
+        """Require all includes that are required by another object."""
+        self.numpy = self.numpy or other.numpy
+        self.deref = self.deref or other.deref
+        for t in self.stl.keys():
+            self.stl[t] = self.stl[t] or other.stl.get(t, False)
+
     def add_include_for_deref(self):
         self.deref = True
 
     def add_include_for_numpy(self):
         self.numpy = True
 
-    def _part_of_tname(self, tname, subtname):
-        return (tname == subtname or tname.startswith(subtname) or
-                ("<" + subtname + ">") in tname or
-                ("<" + subtname + ",") in tname or
-                (", " + subtname + ">") in tname or
-                ("[" + subtname + "]") in tname or
-                ("[" + subtname + ",") in tname or
-                (", " + subtname + "]") in tname)
-
     def declarations_import(self):
-        includes = "from libcpp cimport bool" + os.linesep
-
-        for t in self.stl.keys():
-            if self.stl[t]:
-                includes += ("from libcpp.%(type)s cimport %(type)s"
-                             % {"type": t}) + os.linesep
-
-        return includes
+        return os.linesep.join(self._declarations_import_lines()) + os.linesep
 
     def implementations_import(self):
-        includes = self.declarations_import()
+        lines = self._declarations_import_lines()
         if self.numpy:
-            includes += "cimport numpy as np" + os.linesep
-            includes += "import numpy as np" + os.linesep
+            lines.append("cimport numpy as np")
+            lines.append("import numpy as np")
         if self.deref:
-            includes += ("from cython.operator cimport dereference as deref" +
-                         os.linesep)
-        includes += "cimport _declarations as cpp" + os.linesep
-        return includes
+            lines.append("from cython.operator cimport dereference as deref")
+        lines.append("cimport _declarations as cpp")
+        return os.linesep.join(lines) + os.linesep
+
+    def _declarations_import_lines(self):
+        lines = ["from libcpp cimport bool"]
+        lines.extend("from libcpp.%(type)s cimport %(type)s" % {"type": t}
+                     for t in self.stl.keys() if self.stl[t])
+        return lines
 
 
 class TypeInfo:
     def __init__(self, config=Config(), typedefs=None):
         self.config = config
-        self.classes = []
+        self.classes = set()
         self.typedefs = {}
         if typedefs is not None:
             self.typedefs.update(typedefs)
-        self.enums = []
+        self.enums = set()
         self.spec = {}
+        self._resolved_cache = {}
+
+    def update(self, typedefs, classes, enums):
+        """Add custom types that have been found somewhere else."""
+        self.typedefs.update(typedefs)
+        self.classes.update(classes)
+        self.enums.update(enums)
+        self._resolved_cache.clear()
+
+    def add_typedef(self, tname, underlying_tname):
+        self.typedefs[tname] = underlying_tname
+        self._resolved_cache.clear()
 
     def attach_specialization(self, spec):
         self.spec = spec
+        self._resolved_cache.clear()
 
     def remove_specialization(self):
         self.spec = {}
+        self._resolved_cache.clear()
 
     def underlying_type(self, tname):
-        while tname in self.typedefs or tname in self.spec:
-            if tname in self.typedefs:
-                tname = self.typedefs[tname]
+        if tname in self._resolved_cache:
+            return self._resolved_cache[tname]
+
+        resolved = tname
+        while resolved in self.typedefs or resolved in self.spec:
+            if resolved in self.typedefs:
+                resolved = self.typedefs[resolved]
             else:
-                tname = self.spec[tname]
-        return tname
+                resolved = self.spec[resolved]
+        self._resolved_cache[tname] = resolved
+        return resolved
 
     def get_specialization(self, tname):
         return self.spec.get(tname, tname)
 
 
-IGNORED_NODES = [
+IGNORED_NODES = frozenset([
     cindex.CursorKind.CALL_EXPR,
     cindex.CursorKind.CXX_ACCESS_SPEC_DECL,
     cindex.CursorKind.DECL_REF_EXPR,
-    cindex.CursorKind.DECL_REF_EXPR,
     cindex.CursorKind.MEMBER_REF,
     cindex.CursorKind.NAMESPACE_REF,
     cindex.CursorKind.STRING_LITERAL,
@@ -117,27 +157,42 @@ IGNORED_NODES = [
     cindex.CursorKind.VAR_DECL,
     cindex.CursorKind.UNEXPOSED_DECL,
     cindex.CursorKind.CXX_NEW_EXPR,
-]
+])
 
 LITERAL_NODES = {
     cindex.CursorKind.INTEGER_LITERAL:
         {
             "conversion": int,
-            "typenames": ["short", "int", "long"]
+            "typenames": frozenset(["short", "int", "long"])
         },
     cindex.CursorKind.FLOATING_LITERAL:
         {
             "conversion": float,
-            "typenames": ["float", "double"]
+            "typenames": frozenset(["float", "double"])
         },
     cindex.CursorKind.CXX_BOOL_LITERAL_EXPR:
         {
             "conversion": lambda literal: literal == "true",
-            "typenames": ["bool"]
+            "typenames": frozenset(["bool"])
         }
 }
 
 
+_SHARED_INDEX = None
+
+
+def _get_index():
+    """Clang index that is shared by all parsers.
+
+    Creating an index initializes libclang's internal state, so we create
+    it only once.
+    """
+    global _SHARED_INDEX
+    if _SHARED_INDEX is None:
+        _SHARED_INDEX = cindex.Index.create()
+    return _SHARED_INDEX
+
+
 class Parser(object):
     """The parser builds the abstract syntax tree (AST).
 
@@ -163,14 +218,22 @@ class Parser(object):
 
     verbose : int, optional (default: 0)
         Verbosity level
+
+    cache_dir : str, optional (default: ~/.cache/pywrap)
+        Directory in which parsed files will be cached. The cache is keyed
+        by the content of the file, the version of clang, the include
+        directories and the registered template specializations. Set it to
+        None to disable caching.
     """
     def __init__(self, include_file, includes=Includes(), type_info=TypeInfo(),
-                 incdirs=(), verbose=0):
+                 incdirs=(), verbose=0, cache_dir=DEFAULT_CACHE_DIR):
         self.include_file = include_file
+        self.include_files = [include_file]
         self.includes = includes
         self.type_info = type_info
         self.incdirs = incdirs
         self.verbose = verbose
+        self.cache_dir = cache_dir
 
     def parse(self):
         """Parse the given file.
@@ -182,28 +245,143 @@ class Parser(object):
             wrapper code
         """
         content = self._read_file()
-        translation_unit = self._parse_with_clang(content)
-        self._check_diagnostics(translation_unit.diagnostics)
-        cursor = translation_unit.cursor
+        return self._parse_or_load(content, [content])[0]
 
-        self.init_ast()
-        if self.verbose >= 1:
-            print(make_header("Parsing"))
-        self.convert_ast(cursor, 0)
-        if self.verbose >= 2:
-            print(make_header("AST"))
-            print(self.ast)
+    def _parse_or_load(self, content, sources):
+        """Load ASTs from the cache or parse content with clang.
+
+        Parameters
+        ----------
+        content : str
+            Content of the file that will be parsed by clang
 
-        return self.ast
+        sources : list
+            Contents of all files that we want to wrap
+
+        Returns
+        -------
+        asts : list
+            Abstract syntax tree of each include file
+        """
+        entry = self._load_cached(sources)
+        if entry is None:
+            entry = self._parse_content(content)
+            self._store_cached(sources, entry)
+        return self._use_entry(entry)
+
+    def _load_cached(self, sources):
+        if self.cache_dir is None:
+            return None
+        try:
+            entry = load_cached(self.cache_dir, self._cache_key(sources),
+                                self.include_files)
+        except OSError as e:
+            warnings.warn("Could not read from cache: %s" % e)
+            return None
+        if entry is not None and self.verbose >= 1:
+            print("Loaded AST of %s from cache." % ", ".join(self.include_files))
+        return entry
+
+    def _store_cached(self, sources, entry):
+        if self.cache_dir is None:
+            return
+        try:
+            store_cached(self.cache_dir, self._cache_key(sources), entry,
+                         entry["dependencies"])
+        except OSError as e:
+            # The cache is optional, we can continue without it.
+            warnings.warn("Could not write to cache: %s" % e)
+
+    def _use_entry(self, entry):
+        """Add results of parsing to the includes and the type info."""
+        for category, message in entry["warnings"]:
+            warnings.warn(message, category)
+        self.includes.merge(entry["includes"])
+        self.type_info.update(entry["typedefs"], entry["classes"],
+                              entry["enums"])
+        self.asts = entry["asts"]
+
+        if self.verbose >= 2:
+            for include_file, ast in zip(self.include_files, self.asts):
+                print(make_header("AST of '%s'" % include_file))
+                print(ast)
+
+        return self.asts
+
+    def _cache_key(self, sources):
+        specs = self.type_info.config.registered_template_specializations
+        # The ASTs contain the file names as given, the absolute paths
+        # distinguish equally named files of different projects.
+        include_paths = [os.path.abspath(f) for f in self.include_files]
+        incdirs = [os.path.abspath(incdir) for incdir in self.incdirs]
+        return cache_key(
+            __version__, CACHE_FORMAT, CLANG_VERSION, repr(self.include_files),
+            repr(include_paths), repr(incdirs), repr(sorted(specs.items())),
+            *sources)
+
+    def _parse_content(self, content):
+        """Parse content with clang and collect everything we have to cache.
+
+        Required includes and custom types are collected separately from the
+        ones that have been passed to the constructor so that they can be
+        restored when the result is loaded from the cache.
+        """
+        shared_includes, shared_type_info = self.includes, self.type_info
+        self.includes = Includes()
+        self.type_info = TypeInfo(shared_type_info.config)
+        recorded = []
+        try:
+            with warnings.catch_warnings(record=True) as recorded:
+                warnings.simplefilter("always")
+                translation_unit = self._parse_with_clang(content)
+                self._check_diagnostics(translation_unit.diagnostics)
+                cursor = translation_unit.cursor
+
+                self.init_ast()
+                if self.verbose >= 1:
+                    print(make_header("Parsing"))
+                self.convert_ast(cursor, 0)
+
+            return {"asts": self.asts,
+                    "includes": self.includes,
+                    "typedefs": self.type_info.typedefs,
+                    "classes": self.type_info.classes,
+                    "enums": self.type_info.enums,
+                    "warnings": [(w.category, str(w.message))
+                                 for w in recorded],
+                    "dependencies": self._find_dependencies(translation_unit)}
+        except Exception:
+            for w in recorded:
+                warnings.warn(w.message, w.category)
+            raise
+        finally:
+            self.includes, self.type_info = shared_includes, shared_type_info
+
+    def _find_dependencies(self, translation_unit):
+        """Find all included files except system headers.
+
+        The cached result of parsing is outdated when any of these changes.
+        """
+        dependencies = set()
+        for inclusion in translation_unit.get_includes():
+            start = cindex.SourceLocation.from_position(
+                translation_unit, inclusion.include, 1, 1)
+            if not start.is_in_system_header:
+                dependencies.add(os.path.abspath(inclusion.include.name))
+        return sorted(dependencies)
 
     def _read_file(self):
+        # The suffix makes sure that clang parses the file as C++ header,
+        # even if the header ends with '.h'. The file will not be written.
         self.parsable_file = self.include_file + ".hpp"
-        with open(self.include_file, "r") as infile:
+        self.wanted_files = {os.path.abspath(self.parsable_file): 0}
+        # libclang expects bytes, we do not have to decode the file
+        with open(self.include_file, "rb") as infile:
             content = infile.read()
         return content
 
     def _parse_with_clang(self, content):
-        index = cindex.Index.create()
+        index = _get_index()
         incdirs = ["-I" + incdir for incdir in self.incdirs]
         incdirs += ["-I" + CLANG_INCDIR]
         args = incdirs
@@ -235,7 +413,43 @@ class Parser(object):
             raise ClangError("Could not parse file correctly.", critical)
 
     def init_ast(self):
-        self.ast = Ast()
+        self.asts = [Ast() for _ in self.include_files]
+        self.ast = self.asts[0]
+        self.include_file = self.include_files[0]
+        self._file_indices = {}
+
+        # Maps the kind of a node in Clang's AST to the method that converts
+        # it. Each method returns the flags 'parse_children', 'class_added'
+        # and 'param_added' that are required to traverse the children.
+        # Literals get their conversion bound so that we do not have to look
+        # up the kind of the node again.
+        self._handlers = dict(
+            (kind, functools.partial(self._visit_literal, literal_info))
+            for kind, literal_info in LITERAL_NODES.items())
+        self._handlers.update({
+            cindex.CursorKind.NAMESPACE: self._visit_namespace,
+            cindex.CursorKind.PARM_DECL: self._visit_param_decl,
+            cindex.CursorKind.FUNCTION_DECL: self._visit_function_decl,
+            cindex.CursorKind.CLASS_TEMPLATE: self._visit_class_template,
+            cindex.CursorKind.FUNCTION_TEMPLATE: self._visit_function_template,
+            cindex.CursorKind.TEMPLATE_TYPE_PARAMETER:
+                self._visit_template_type_parameter,
+            cindex.CursorKind.TEMPLATE_NON_TYPE_PARAMETER:
+                self._visit_template_non_type_parameter,
+            cindex.CursorKind.CXX_METHOD: self._visit_cxx_method,
+            cindex.CursorKind.CONSTRUCTOR: self._visit_constructor,
+            cindex.CursorKind.CLASS_DECL: self._visit_class_decl,
+            cindex.CursorKind.CXX_BASE_SPECIFIER:
+                self._visit_cxx_base_specifier,
+            cindex.CursorKind.STRUCT_DECL: self._visit_struct_decl,
+            cindex.CursorKind.FIELD_DECL: self._visit_field_decl,
+            cindex.CursorKind.TYPEDEF_DECL: self._visit_typedef_decl,
+            cindex.CursorKind.ENUM_DECL: self._visit_enum_decl,
+            cindex.CursorKind.ENUM_CONSTANT_DECL:
+                self._visit_enum_constant_decl,
+            cindex.CursorKind.COMPOUND_STMT: self._visit_compound_stmt,
+            cindex.CursorKind.STRING_LITERAL: self._visit_string_literal,
+        })
         self.last_type = None
         self.last_enum = None
         self.unnamed_struct = None
@@ -255,144 +469,244 @@ class Parser(object):
         depth : int
             Current depth in the AST
         """
-        namespace = self.namespace
+        # We use an explicit stack instead of recursion: Clang's AST can be
+        # very deep and each Python call is expensive. A node without a cursor
+        # marks the end of the subtree of a cursor and restores the state
+        # that has been modified while visiting this cursor.
+        stack = [(node, depth, None, None)]
+        while stack:
+            node, depth, namespace, added = stack.pop()
+            if node is None:
+                class_added, param_added = added
+                if class_added:
+                    self.last_type = None
+                if param_added:
+                    self.last_param = None
+                self.namespace = namespace
+                continue
+
+            namespace = self.namespace
+            parse_children, class_added, param_added = self._visit_node(
+                node, depth)
+            # Most nodes are skipped and do not modify the state.
+            if (parse_children or class_added or param_added or
+                    self.namespace != namespace):
+                stack.append(
+                    (None, depth, namespace, (class_added, param_added)))
+            if parse_children:
+                stack.extend((child, depth + 1, None, None)
+                              for child in reversed(list(node.get_children())))
+
+    def _visit_node(self, node, depth):
+        """Convert a single node of Clang's AST.
+
+        Returns
+        -------
+        parse_children : bool
+            Children of the node should be visited
+
+        class_added : bool
+            A class has been added and will be the context of the children
+
+        param_added : bool
+            A parameter has been added and will be the context of the children
+        """
+        # Most nodes come from system headers, so we skip them before we
+        # do anything else. Each attribute access goes through ctypes, so we
+        # only read attributes once.
+        location_file = node.location.file
+        if (location_file is not None and
+                not self._select_file(location_file)):
+            return False, False, False
+
+        kind = node.kind
         if self.verbose >= 1:
-            line = "  " * depth + "Node: %s" % node.kind
-            if node.spelling:
-                line += ", '%s'" % node.spelling
-            if node.type.spelling:
-                line += " (type: '%s')" % node.type.spelling
+            line = "  " * depth + "Node: %s" % kind
+            spelling = node.spelling
+            if spelling:
+                line += ", '%s'" % spelling
+            type_spelling = node.type.spelling
+            if type_spelling:
+                line += " (type: '%s')" % type_spelling
             print(line)
 
-        parse_children = True
-        class_added = False
-        param_added = False
         try:
-            if node.location.file is None:
-                pass
-            elif node.location.file.name != self.parsable_file:
-                return
-            elif node.kind == cindex.CursorKind.NAMESPACE:
-                if self.namespace == "":
-                    self.namespace = node.displayname
-                else:
-                    self.namespace = self.namespace + "::" + node.displayname
-            elif node.kind == cindex.CursorKind.PARM_DECL:
-                parse_children = self.add_param(
-                    node.displayname, node.type.spelling)
-                param_added = True
-            elif node.kind == cindex.CursorKind.FUNCTION_DECL:
-                parse_children = self.add_function(
-                    node.spelling, node.result_type.spelling,
-                    self.namespace, convert_to_docstring(node.raw_comment))
-            elif node.kind == cindex.CursorKind.CLASS_TEMPLATE:
-                name = node.displayname.split("<")[0]
-                self.add_template_class(
-                    name, convert_to_docstring(node.raw_comment))
-                class_added = True
-            elif node.kind == cindex.CursorKind.FUNCTION_TEMPLATE:
-                if self.last_type is None:
-                    self.add_template_function(
-                        node.spelling, node.result_type.spelling,
-                        convert_to_docstring(node.raw_comment))
-                else:
-                    self.add_template_method(
-                        node.spelling, node.result_type.spelling,
-                        convert_to_docstring(node.raw_comment))
-            elif node.kind == cindex.CursorKind.TEMPLATE_TYPE_PARAMETER:
-                self.add_template_type(node.displayname)
-            elif node.kind == cindex.CursorKind.TEMPLATE_NON_TYPE_PARAMETER:
-                warnings.warn(
-                    "Template non-type parameters are not supported by "
-                    "Cython <= 0.24. The name of the parameter is '%s'."
-                    % node.displayname)
-            elif node.kind == cindex.CursorKind.CXX_METHOD:
-                if node.access_specifier == cindex.AccessSpecifier.PUBLIC:
-                    if node.is_static_method():
-                        namespace = self.namespace
-                        if namespace != "":
-                            namespace += "::"
-                        namespace += self.last_type.name
-                        parse_children = self.add_function(
-                            node.spelling, node.result_type.spelling,
-                            namespace, convert_to_docstring(node.raw_comment))
-                    else:
-                        parse_children = self.add_method(
-                            node.spelling, node.result_type.spelling,
-                            convert_to_docstring(node.raw_comment))
-                else:
-                    parse_children = False
-            elif node.kind == cindex.CursorKind.CONSTRUCTOR:
-                if node.access_specifier == cindex.AccessSpecifier.PUBLIC:
-                    parse_children = self.add_ctor(
-                        convert_to_docstring(node.raw_comment))
-                else:
-                    parse_children = False
-            elif node.kind == cindex.CursorKind.CLASS_DECL:
-                parse_children = self.add_class(
-                    node.displayname, convert_to_docstring(node.raw_comment))
-                class_added = True
-            elif node.kind == cindex.CursorKind.CXX_BASE_SPECIFIER:
-                if self.last_type.base is not None:
-                    warnings.warn("Class '%s' already has a base class: '%s', "
-                                  "ignoring '%s'."
-                                  % (self.last_type.name, self.last_type.base,
-                                     node.type.spelling))
-                else:
-                    self.last_type.base = node.type.spelling
-                parse_children = False
-            elif node.kind == cindex.CursorKind.STRUCT_DECL:
-                parse_children = self.add_struct_decl(node.displayname)
-            elif node.kind == cindex.CursorKind.FIELD_DECL:
-                if node.access_specifier == cindex.AccessSpecifier.PUBLIC:
-                    parse_children = self.add_field(
-                        node.displayname, node.type.spelling,
-                        convert_to_docstring(node.raw_comment))
-                else:
-                    parse_children = False
-            elif node.kind == cindex.CursorKind.TYPEDEF_DECL:
-                tname = node.displayname
-                parse_children = self.add_typedef(
-                    node.underlying_typedef_type.spelling, tname)
-            elif node.kind == cindex.CursorKind.ENUM_DECL:
-                parse_children = self.add_enum(
-                    node.displayname, convert_to_docstring(node.raw_comment))
-            elif node.kind == cindex.CursorKind.ENUM_CONSTANT_DECL:
-                self.last_enum.constants.append(node.displayname)
-            elif node.kind == cindex.CursorKind.COMPOUND_STMT:
-                parse_children = False
-            elif node.kind in LITERAL_NODES:
-                literal_info = LITERAL_NODES[node.kind]
-                if (self.last_param is not None and
-                            self.last_param.tipe in literal_info["typenames"]):
-                    tokens = list(node.get_tokens())
-                    assert len(tokens) >= 1
-                    value = literal_info["conversion"](tokens[0].spelling)
-                    self.last_param.default_value = value
-            elif node.kind == cindex.CursorKind.STRING_LITERAL:
-                if (self.last_param is not None and
-                            self.last_param.tipe == "string"):
-                    self.last_param.default_value = node.displayname
-            elif node.kind in IGNORED_NODES:
+            if location_file is None:
+                return True, False, False
+
+            handler = self._handlers.get(kind)
+            if handler is not None:
+                return handler(node)
+
+            if kind in IGNORED_NODES:
                 if self.verbose >= 3:
                     print("  " * depth + "Ignored node: %s, %s"
-                          % (node.kind, node.displayname))
+                          % (kind, node.displayname))
             else:
                 print("  " * depth + "Unknown node: %s, %s"
-                      % (node.kind, node.displayname))
+                      % (kind, node.displayname))
+            return True, False, False
         except NotImplementedError as e:
             warnings.warn(e.message + " Ignoring node '%s'" % node.displayname)
-            parse_children = False
+            return False, False, False
 
-        if parse_children:
-            for child in node.get_children():
-                self.convert_ast(child, depth + 1)
-        if class_added:
-            self.last_type = None
-        if param_added:
-            self.last_param = None
+    def _visit_namespace(self, node):
+        name = node.displayname
+        if self.namespace == "":
+            self.namespace = name
+        else:
+            self.namespace = self.namespace + "::" + name
+        return True, False, False
+
+    def _visit_param_decl(self, node):
+        parse_children = self.add_param(node.displayname, node.type.spelling)
+        return parse_children, False, True
+
+    def _visit_function_decl(self, node):
+        parse_children = self.add_function(
+            node.spelling, node.result_type.spelling, self.namespace,
+            convert_to_docstring(node.raw_comment))
+        return parse_children, False, False
+
+    def _visit_class_template(self, node):
+        name = node.displayname.split("<")[0]
+        self.add_template_class(name, convert_to_docstring(node.raw_comment))
+        return True, True, False
+
+    def _visit_function_template(self, node):
+        name = node.spelling
+        result_type = node.result_type.spelling
+        comment = convert_to_docstring(node.raw_comment)
+        if self.last_type is None:
+            self.add_template_function(name, result_type, comment)
+        else:
+            self.add_template_method(name, result_type, comment)
+        return True, False, False
+
+    def _visit_template_type_parameter(self, node):
+        self.add_template_type(node.displayname)
+        return True, False, False
+
+    def _visit_template_non_type_parameter(self, node):
+        warnings.warn(
+            "Template non-type parameters are not supported by "
+            "Cython <= 0.24. The name of the parameter is '%s'."
+            % node.displayname)
+        return True, False, False
+
+    def _visit_cxx_method(self, node):
+        if node.access_specifier != cindex.AccessSpecifier.PUBLIC:
+            return False, False, False
+
+        name = node.spelling
+        result_type = node.result_type.spelling
+        comment = convert_to_docstring(node.raw_comment)
+        if node.is_static_method():
+            namespace = self.namespace
+            if namespace != "":
+                namespace += "::"
+            namespace += self.last_type.name
+            parse_children = self.add_function(
+                name, result_type, namespace, comment)
+        else:
+            parse_children = self.add_method(name, result_type, comment)
+        return parse_children, False, False
+
+    def _visit_constructor(self, node):
+        if node.access_specifier != cindex.AccessSpecifier.PUBLIC:
+            return False, False, False
+
+        parse_children = self.add_ctor(convert_to_docstring(node.raw_comment))
+        return parse_children, False, False
+
+    def _visit_class_decl(self, node):
+        parse_children = self.add_class(
+            node.displayname, convert_to_docstring(node.raw_comment))
+        return parse_children, True, False
+
+    def _visit_cxx_base_specifier(self, node):
+        base = node.type.spelling
+        if self.last_type.base is not None:
+            warnings.warn("Class '%s' already has a base class: '%s', "
+                          "ignoring '%s'."
+                          % (self.last_type.name, self.last_type.base, base))
+        else:
+            self.last_type.base = base
+        return False, False, False
+
+    def _visit_struct_decl(self, node):
+        parse_children = self.add_struct_decl(node.displayname)
+        return parse_children, False, False
+
+    def _visit_field_decl(self, node):
+        if node.access_specifier != cindex.AccessSpecifier.PUBLIC:
+            return False, False, False
+
+        parse_children = self.add_field(
+            node.displayname, node.type.spelling,
+            convert_to_docstring(node.raw_comment))
+        return parse_children, False, False
+
+    def _visit_typedef_decl(self, node):
+        parse_children = self.add_typedef(
+            node.underlying_typedef_type.spelling, node.displayname)
+        return parse_children, False, False
+
+    def _visit_enum_decl(self, node):
+        parse_children = self.add_enum(
+            node.displayname, convert_to_docstring(node.raw_comment))
+        return parse_children, False, False
+
+    def _visit_enum_constant_decl(self, node):
+        self.last_enum.constants.append(node.displayname)
+        return True, False, False
+
+    def _visit_compound_stmt(self, node):
+        return False, False, False
+
+    def _visit_literal(self, literal_info, node):
+        if (self.last_param is not None and
+                    self.last_param.tipe in literal_info["typenames"]):
+            # only the first token is required, do not tokenize the rest
+            first_token = next(iter(node.get_tokens()), None)
+            assert first_token is not None
+            value = literal_info["conversion"](first_token.spelling)
+            self.last_param.default_value = value
+        return True, False, False
+
+    def _visit_string_literal(self, node):
+        if (self.last_param is not None and
+                    self.last_param.tipe == "string"):
+            self.last_param.default_value = node.displayname
+        return True, False, False
+
+    def _select_file(self, location_file):
+        """Direct new AST nodes to the AST of the file that contains them.
+
+        Parameters
+        ----------
+        location_file : clang.cindex.File
+            File that contains the current node
 
-        self.namespace = namespace
+        Returns
+        -------
+        wanted : bool
+            The file is one of the files that we want to wrap
+        """
+        # cindex creates a new File object for each node but the underlying
+        # file handle is the same for all nodes of a file in a translation
+        # unit. Comparing handles avoids retrieving the file name of each
+        # node from libclang.
+        handle = ctypes.addressof(location_file.obj.contents)
+        index = self._file_indices.get(handle, -1)
+        if index == -1:
+            index = self.wanted_files.get(os.path.abspath(location_file.name))
+            self._file_indices[handle] = index
+        if index is None:
+            return False
+        self.include_file = self.include_files[index]
+        self.ast = self.asts[index]
+        return True
 
     def add_typedef(self, underlying_tname, tname):
         if underlying_tname == "struct " + tname:
@@ -401,7 +715,7 @@ class Parser(object):
                                   "unnamed struct")
             self.unnamed_struct.name = tname
             self.ast.nodes.append(self.unnamed_struct)
-            self.type_info.classes.append(tname)
+            self.type_info.classes.add(tname)
             self.unnamed_struct = None
             self.last_type = None
             return False
@@ -415,7 +729,7 @@ class Parser(object):
             typedef = Typedef(self.include_file, namespace, tname,
                               underlying_tname)
             self.ast.nodes.append(typedef)
-            self.type_info.typedefs[tname] = underlying_tname
+            self.type_info.add_typedef(tname, underlying_tname)
             return True
 
     def add_struct_decl(self, name):
@@ -433,7 +747,7 @@ class Parser(object):
         else:
             namespace = self.namespace
         enum = Enum(self.include_file, namespace, name, comment)
-        self.type_info.enums.append(name)
+        self.type_info.enums.add(name)
         self.last_enum = enum
         self.ast.nodes.append(enum)
         return True
@@ -464,7 +778,7 @@ class Parser(object):
         clazz = Clazz(self.include_file, self.namespace, name, comment)
         self.ast.nodes.append(clazz)
         self.last_type = clazz
-        self.type_info.classes.append(name)
+        self.type_info.classes.add(name)
         return True
 
     def add_template_class(self, name, comment=""):
@@ -477,7 +791,7 @@ class Parser(object):
         for key in registered_specs:
             if name == key:
                 for spec_name, _ in registered_specs[key]:
-                    self.type_info.classes.append(spec_name)
+                    self.type_info.classes.add(spec_name)
                 break
 
         return True
@@ -523,3 +837,163 @@ class Parser(object):
         field = Field(name, tname, self.last_type.name, comment)
         self.last_type.nodes.append(field)
         return False
+
+
+class MultiFileParser(Parser):
+    """Parse multiple header files with one run of clang.
+
+    All headers will be included in one translation unit so that system
+    headers and common dependencies only have to be parsed once. If that
+    fails, e.g. because headers that include each other do not have include
+    guards, each header will be parsed separately.
+
+    Parameters
+    ----------
+    include_files : list
+        Names of the files that contain the declarations.
+
+    includes : Includes, optional
+        Will be filled with information about required import and cimport
+        statements.
+
+    type_info : TypeInfo, optional
+        Collects information about custom types.
+
+    incdirs : list, optional
+        Include directories that will be required to parse the files with
+        clang.
+
+    verbose : int, optional (default: 0)
+        Verbosity level
+
+    cache_dir : str, optional (default: ~/.cache/pywrap)
+        Directory in which parsed files will be cached. Set it to None to
+        disable caching.
+    """
+    def __init__(self, include_files, includes=Includes(),
+                 type_info=TypeInfo(), incdirs=(), verbose=0,
+                 cache_dir=DEFAULT_CACHE_DIR):
+        super(MultiFileParser, self).__init__(
+            include_files[0], includes, type_info, incdirs, verbose, cache_dir)
+        self.include_files = list(include_files)
+
+    def parse(self):
+        """Parse the given files.
+
+        Returns
+        -------
+        asts : list
+            Abstract syntax tree of each file in the same order as the
+            include files
+        """
+        content, sources = self._read_files()
+        entry = self._load_cached(sources)
+        if entry is None:
+            try:
+                # warnings of a failed attempt are irrelevant
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    entry = self._parse_content(content)
+            except ClangError:
+                # We remember the failure so that we do not have to parse
+                # the files together again.
+                entry = {"parse_separately": True, "dependencies": []}
+            self._store_cached(sources, entry)
+
+        if entry.get("parse_separately", False):
+            if self.verbose >= 1:
+                print("Could not parse all files at once, parsing them "
+                      "separately.")
+            return [Parser(include_file, self.includes, self.type_info,
+                           self.incdirs, self.verbose, self.cache_dir).parse()
+                    for include_file in self.include_files]
+        return self._use_entry(entry)
+
+    def _read_files(self):
+        self.parsable_file = os.path.abspath("pywrap_combined.cc")
+        self.wanted_files = {}
+        sources = []
+        directives = []
+        for index, include_file in enumerate(self.include_files):
+            path = os.path.abspath(include_file)
+            self.wanted_files[path] = index
+            with open(include_file, "rb") as infile:
+                sources.append(infile.read())
+            directives.append("#include \"%s\"" % path)
+        content = os.linesep.join(directives) + os.linesep
+        return content, sources
+
+
+def parse_in_parallel(include_files, includes=Includes(), type_info=TypeInfo(),
+                      incdirs=(), verbose=0, cache_dir=DEFAULT_CACHE_DIR,
+                      n_jobs=None):
+    """Parse each header file with clang in a separate process.
+
+    Headers that can be loaded from the cache will not be parsed again.
+
+    Parameters
+    ----------
+    include_files : list
+        Names of the files that contain the declarations.
+
+    includes : Includes, optional
+        Will be filled with information about required import and cimport
+        statements.
+
+    type_info : TypeInfo, optional
+        Collects information about custom types.
+
+    incdirs : list, optional
+        Include directories that will be required to parse the files with
+        clang.
+
+    verbose : int, optional (default: 0)
+        Verbosity level
+
+    cache_dir : str, optional (default: ~/.cache/pywrap)
+        Directory in which parsed files will be cached. Set it to None to
+        disable caching.
+
+    n_jobs : int, optional (default: number of CPUs)
+        Maximum number of processes
+
+    Returns
+    -------
+    asts : list
+        Abstract syntax tree of each file in the same order as the include
+        files
+    """
+    parsers = [Parser(include_file, includes, type_info, incdirs, verbose,
+                      cache_dir) for include_file in include_files]
+    sources = [[parser._read_file()] for parser in parsers]
+    entries = [parser._load_cached(source)
+               for parser, source in zip(parsers, sources)]
+
+    missing = [i for i in range(len(parsers)) if entries[i] is None]
+    if missing:
+        # Only available in Python 2 if the backport 'futures' is installed
+        from concurrent.futures import ProcessPoolExecutor
+        # The configuration might contain classes from the user's
+        # configuration file that cannot be imported by other processes.
+        # The parser only needs the template specializations.
+        specs = type_info.config.registered_template_specializations
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [(i, executor.submit(
+                _parse_header, include_files[i], specs, incdirs, verbose))
+                for i in missing]
+            for i, future in futures:
+                entries[i] = future.result()
+                parsers[i]._store_cached(sources[i], entries[i])
+
+    asts = []
+    for parser, entry in zip(parsers, entries):
+        asts.extend(parser._use_entry(entry))
+    return asts
+
+
+def _parse_header(include_file, specs, incdirs, verbose):
+    config = Config()
+    config.registered_template_specializations.update(specs)
+    parser = Parser(include_file, Includes(), TypeInfo(config), incdirs,
+                    verbose, cache_dir=None)
+    return parser._parse_content(parser._read_file())
@@ -3,17 +3,24 @@ from abc import ABCMeta, abstractmethod
 from .ast import TemplateClazzSpecialization, Function, Param, Method
 
 
-class Specializer(object):
+# Abstract base class that works with Python 2 and 3, abc.ABC does not exist
+# in Python 2 and __metaclass__ is ignored by Python 3
+_ABC = ABCMeta("_ABC", (object,), {"__slots__": ()})
+
+
+class Specializer(_ABC):
     """Convert templates to specializations for specific types."""
-    __metaclass__ = ABCMeta
+    __slots__ = ("config", "_spec_cache")
+
     def __init__(self, config):
         self.config = config
+        self._spec_cache = {}
 
     def specialize(self, general):
         try:
             specs = self._lookup_specification(general)
         except LookupError as e:
-            warnings.warn(e.message)
+            warnings.warn(str(e))
             general.ignored = True
             return []
 
@@ -21,12 +28,18 @@ class Specializer(object):
 
     def _lookup_specification(self, general):
         key = self._key(general)
+        specs = self._spec_cache.get(key)
+        if specs is not None:
+            return specs
+
         if key not in self.config.registered_template_specializations:
             raise LookupError(
                 "No template specialization registered for template with key "
                 "'%s' with the following template types: %s"
                 % (key, ", ".join(general.template_types)))
-        return self.config.registered_template_specializations[key]
+        specs = self.config.registered_template_specializations[key]
+        self._spec_cache[key] = specs
+        return specs
 
     def _key(self, general):
         if general.namespace != "":
@@ -37,6 +50,10 @@ class Specializer(object):
     def _replace_specification(self, tipe, spec):
         return spec.get(tipe, tipe)
 
+    def _specialize_params(self, general, spec):
+        return [Param(arg.name, self._replace_specification(arg.tipe, spec))
+                for arg in general.nodes]
+
     @abstractmethod
     def _specialize(self, general, specs):
         """Specialize the given template."""
@@ -44,25 +61,25 @@ class Specializer(object):
 
 class ClassSpecializer(Specializer):
     """Convert a template class to a class."""
+    __slots__ = ()
+
     def __init__(self, config):
         super(ClassSpecializer, self).__init__(config)
 
     def _specialize(self, general, specs):
-        specialized_classes = []
-
-        for name, spec in specs:
-            types = [spec[t] for t in general.template_types]
-            cppname = "%s[%s]" % (general.name, ", ".join(types))
-            specialized = TemplateClazzSpecialization(
-                general.filename, general.namespace, name, cppname, spec,
-                general.comment)
-            specialized_classes.append(specialized)
-
-        return specialized_classes
+        template_types = general.template_types
+        return [TemplateClazzSpecialization(
+                    general.filename, general.namespace, name,
+                    "%s[%s]" % (general.name,
+                                ", ".join(spec[t] for t in template_types)),
+                    spec, general.comment)
+                for name, spec in specs]
 
 
 class FunctionSpecializer(Specializer):
     """Convert a template function to a function."""
+    __slots__ = ()
+
     def __init__(self, config):
         super(FunctionSpecializer, self).__init__(config)
 
@@ -70,20 +87,17 @@ class FunctionSpecializer(Specializer):
         specialized_functions = []
         for name, spec in specs:
             result_type = self._replace_specification(general.result_type, spec)
-
             specialized = Function(general.filename, general.namespace, name,
                                    result_type, general.comment)
-
-            for arg in general.nodes:
-                tipe = self._replace_specification(arg.tipe, spec)
-                specialized.nodes.append(Param(arg.name, tipe))
-
+            specialized.nodes.extend(self._specialize_params(general, spec))
             specialized_functions.append(specialized)
         return specialized_functions
 
 
 class MethodSpecializer(Specializer):
     """Convert a template method to a method."""
+    __slots__ = ()
+
     def __init__(self, config):
         super(MethodSpecializer, self).__init__(config)
 
@@ -94,13 +108,8 @@ class MethodSpecializer(Specializer):
         specialized_methods = []
         for name, spec in specs:
             result_type = self._replace_specification(general.result_type, spec)
-
             specialized = Method(name, result_type, general.class_name,
                                  general.comment)
-
-            for arg in general.nodes:
-                tipe = self._replace_specification(arg.tipe, spec)
-                specialized.nodes.append(Param(arg.name, tipe))
-
+            specialized.nodes.extend(self._specialize_params(general, spec))
             specialized_methods.append(specialized)
         return specialized_methods
\ No newline at end of file
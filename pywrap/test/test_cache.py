@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import time
+from pywrap.cache import cache_key, load_cached, store_cached, prune_cache
+from nose.tools import assert_equal, assert_not_equal, assert_is_none
+
+
+def test_cache_key_depends_on_all_parts():
+    assert_equal(cache_key("a", "b"), cache_key("a", "b"))
+    assert_not_equal(cache_key("a", "b"), cache_key("a", "c"))
+    assert_not_equal(cache_key("ab", "c"), cache_key("a", "bc"))
+    assert_equal(cache_key(b"a"), cache_key("a"))
+
+
+def test_store_and_load():
+    cache_dir = os.path.join(tempfile.mkdtemp(), "pywrap")
+    try:
+        key = cache_key("content")
+        assert_is_none(load_cached(cache_dir, key))
+        store_cached(cache_dir, key, {"classes": ["A"]})
+        assert_equal(load_cached(cache_dir, key), {"classes": ["A"]})
+        assert_equal(os.listdir(cache_dir), [key + ".pkl"])
+    finally:
+        shutil.rmtree(os.path.dirname(cache_dir))
+
+
+def test_modified_source_invalidates_entry():
+    cache_dir = tempfile.mkdtemp()
+    _, source = tempfile.mkstemp(".hpp")
+    try:
+        key = cache_key("content")
+        store_cached(cache_dir, key, "entry")
+        assert_equal(load_cached(cache_dir, key, [source]), "entry")
+        future = time.time() + 10
+        os.utime(source, (future, future))
+        assert_is_none(load_cached(cache_dir, key, [source]))
+    finally:
+        shutil.rmtree(cache_dir)
+        os.remove(source)
+
+
+def test_modified_dependency_invalidates_entry():
+    cache_dir = tempfile.mkdtemp()
+    _, dependency = tempfile.mkstemp(".hpp")
+    try:
+        key = cache_key("content")
+        store_cached(cache_dir, key, "entry", [dependency])
+        assert_equal(load_cached(cache_dir, key), "entry")
+        with open(dependency, "w") as f:
+            f.write("#define A B")
+        assert_is_none(load_cached(cache_dir, key))
+    finally:
+        shutil.rmtree(cache_dir)
+        os.remove(dependency)
+
+
+def test_prune_old_entries():
+    cache_dir = tempfile.mkdtemp()
+    try:
+        old_key = cache_key("old")
+        store_cached(cache_dir, old_key, "entry")
+        past = time.time() - 100
+        os.utime(os.path.join(cache_dir, old_key + ".pkl"), (past, past))
+        new_key = cache_key("new")
+        store_cached(cache_dir, new_key, "entry")
+        prune_cache(cache_dir, max_age=10)
+        assert_is_none(load_cached(cache_dir, old_key))
+        assert_equal(load_cached(cache_dir, new_key), "entry")
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+def test_corrupted_entry():
+    cache_dir = tempfile.mkdtemp()
+    try:
+        key = cache_key("content")
+        with open(os.path.join(cache_dir, key + ".pkl"), "w") as f:
+            f.write("no pickle")
+        assert_is_none(load_cached(cache_dir, key))
+    finally:
+        shutil.rmtree(cache_dir)
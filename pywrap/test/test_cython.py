@@ -1,8 +1,10 @@
 import os
-from pywrap.cython import make_cython_wrapper, load_config
+import shutil
+import tempfile
+from pywrap.cython import make_cython_wrapper, load_config, run_setup
 from pywrap.parser import TypeInfo
 from nose.tools import (assert_raises_regexp, assert_false, assert_equal,
-                        assert_is_not_none)
+                        assert_is_not_none, assert_in, assert_not_in)
 
 
 def test_missing_file():
@@ -52,6 +54,54 @@ def test_underlying_type():
                  "float")
 
 
+def test_underlying_type_with_specialization():
+    type_info = TypeInfo(typedefs={"tdef": "T"})
+    assert_equal(type_info.underlying_type("tdef"), "T")
+    type_info.attach_specialization({"T": "double"})
+    assert_equal(type_info.underlying_type("tdef"), "double")
+    type_info.remove_specialization()
+    assert_equal(type_info.underlying_type("tdef"), "T")
+    type_info.add_typedef("T", "int")
+    assert_equal(type_info.underlying_type("tdef"), "int")
+
+
 def test_missing_incdir():
     assert_raises_regexp(ValueError, "Include directory", make_cython_wrapper,
                          "test.hpp", [], incdirs=["/doesnotexist"])
+
+
+def test_invalid_number_of_jobs():
+    for n_jobs in [0, -2]:
+        assert_raises_regexp(ValueError, "Number of jobs", make_cython_wrapper,
+                             "test.hpp", [], n_jobs=n_jobs)
+
+
+def test_run_setup_in_process():
+    tmpdir = tempfile.mkdtemp()
+    setuppy_name = os.path.join(tmpdir, "setup.py")
+    with open(setuppy_name, "w") as f:
+        f.write("""import os
+import sys
+os.environ["PYWRAP_TEST_VARIABLE"] = "1"
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+sys.exit("error: build failed")
+""")
+    errors = os.path.join(tmpdir, "errors.txt")
+
+    cwd = os.getcwd()
+    stderr_fno = os.dup(2)
+    try:
+        with open(errors, "w") as f:
+            os.dup2(f.fileno(), 2)
+        run_setup(setuppy_name, in_process=True)
+    finally:
+        os.dup2(stderr_fno, 2)
+        os.close(stderr_fno)
+        with open(errors, "r") as f:
+            error_output = f.read()
+        os.chdir(cwd)
+        shutil.rmtree(tmpdir)
+
+    assert_in("error: build failed", error_output)
+    assert_not_in("PYWRAP_TEST_VARIABLE", os.environ)
+    assert_equal(os.getcwd(), cwd)
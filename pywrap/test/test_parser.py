@@ -1,6 +1,10 @@
 import os
+import pickle
+import shutil
 import tempfile
-from pywrap.parser import Parser, Includes, ClangError
+from pywrap.defaultconfig import Config
+from pywrap.parser import (Parser, MultiFileParser, Includes, TypeInfo,
+                           ClangError, parse_in_parallel)
 from nose.tools import (assert_true, assert_equal, assert_is_not_none,
                         assert_is_none, assert_raises_regexp)
 from pywrap.testing import assert_warns_message
@@ -19,6 +23,18 @@ def test_include_map():
     assert_true(inc.stl["string"])
 
 
+def test_merge_includes():
+    inc = Includes()
+    inc.add_include_for("vector[double]")
+    other = Includes()
+    other.add_include_for("string")
+    other.add_include_for_deref()
+    inc.merge(other)
+    assert_true(inc.stl["vector"])
+    assert_true(inc.stl["string"])
+    assert_true(inc.deref)
+
+
 def test_add_typedef():
     parser = Parser("test.hpp")
     parser.init_ast()
@@ -165,7 +181,7 @@ void function2() {}
         f.write(testcode)
 
     try:
-        parser = Parser(filename)
+        parser = Parser(filename, cache_dir=None)
         ast = parser.parse()
     finally:
         if os.path.exists(filename):
@@ -187,9 +203,255 @@ int function
         f.write(testcode)
 
     try:
-        parser = Parser(filename)
+        parser = Parser(filename, cache_dir=None)
         assert_raises_regexp(ClangError, "Could not parse file correctly.",
                              parser.parse)
     finally:
         if os.path.exists(filename):
             os.remove(filename)
+
+
+def test_parse_file_from_cache():
+    testcode = """
+typedef double myfloat;
+enum E
+{
+    E1, E2
+};
+
+class A
+{
+public:
+    A(myfloat d) {}
+};
+"""
+
+    _, filename = tempfile.mkstemp(".hpp")
+    with open(filename, "w") as f:
+        f.write(testcode)
+    cache_dir = tempfile.mkdtemp()
+
+    try:
+        parser = Parser(filename, Includes(), TypeInfo(), cache_dir=cache_dir)
+        ast = parser.parse()
+        assert_equal(len(os.listdir(cache_dir)), 1)
+
+        type_info = TypeInfo()
+        parser = Parser(filename, Includes(), type_info, cache_dir=cache_dir)
+        cached_ast = parser.parse()
+    finally:
+        if os.path.exists(filename):
+            os.remove(filename)
+        shutil.rmtree(cache_dir)
+
+    assert_equal(str(cached_ast), str(ast))
+    assert_equal(type_info.typedefs, {"myfloat": "double"})
+    assert_equal(type_info.classes, {"A"})
+    assert_equal(type_info.enums, {"E"})
+
+
+def test_modified_include_invalidates_cache():
+    tmpdir = tempfile.mkdtemp()
+    filename = os.path.join(tmpdir, "main.hpp")
+    with open(filename, "w") as f:
+        f.write("#include \"name.hpp\"\nclass CLS {};\n")
+    included_file = os.path.join(tmpdir, "name.hpp")
+    cache_dir = os.path.join(tmpdir, "cache")
+
+    try:
+        with open(included_file, "w") as f:
+            f.write("#define CLS Foo\n")
+        parser = Parser(filename, Includes(), TypeInfo(), cache_dir=cache_dir)
+        ast = parser.parse()
+        with open(included_file, "w") as f:
+            f.write("#define CLS Bar\n")
+        parser = Parser(filename, Includes(), TypeInfo(), cache_dir=cache_dir)
+        modified_ast = parser.parse()
+    finally:
+        shutil.rmtree(tmpdir)
+
+    assert_equal(ast.nodes[0].name, "Foo")
+    assert_equal(modified_ast.nodes[0].name, "Bar")
+
+
+def test_invalid_cache_dir():
+    _, filename = tempfile.mkstemp(".hpp")
+    with open(filename, "w") as f:
+        f.write("class A {};")
+
+    try:
+        # a directory in a regular file cannot be created
+        cache_dir = os.path.join(filename, "cache")
+        parser = Parser(filename, Includes(), TypeInfo(), cache_dir=cache_dir)
+        ast = assert_warns_message(UserWarning, "Could not write to cache",
+                                   parser.parse)
+    finally:
+        os.remove(filename)
+
+    assert_equal(ast.nodes[0].name, "A")
+
+
+def test_equally_named_files_of_different_projects():
+    tmpdir = tempfile.mkdtemp()
+    cache_dir = os.path.join(tmpdir, "cache")
+    for project, name in [("p1", "One"), ("p2", "Two")]:
+        os.mkdir(os.path.join(tmpdir, project))
+        with open(os.path.join(tmpdir, project, "foo.hpp"), "w") as f:
+            f.write("#include \"bar.hpp\"\nclass CLS {};\n")
+        with open(os.path.join(tmpdir, project, "bar.hpp"), "w") as f:
+            f.write("#define CLS %s\n" % name)
+
+    cwd = os.getcwd()
+    try:
+        names = []
+        for project in ["p1", "p2"]:
+            os.chdir(os.path.join(tmpdir, project))
+            parser = Parser("foo.hpp", Includes(), TypeInfo(),
+                            cache_dir=cache_dir)
+            names.append(parser.parse().nodes[0].name)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmpdir)
+
+    assert_equal(names, ["One", "Two"])
+
+
+def test_parse_multiple_files():
+    tmpdir = tempfile.mkdtemp()
+    filename1 = os.path.join(tmpdir, "part1.hpp")
+    filename2 = os.path.join(tmpdir, "part2.hpp")
+    with open(filename1, "w") as f:
+        f.write("""#pragma once
+#include "part2.hpp"
+class A
+{
+public:
+    B* make() { return new B(); }
+};
+""")
+    with open(filename2, "w") as f:
+        f.write("""#pragma once
+class B
+{
+public:
+    int getValue() { return 5; }
+};
+""")
+
+    try:
+        type_info = TypeInfo()
+        parser = MultiFileParser([filename1, filename2], Includes(), type_info,
+                                 cache_dir=None)
+        asts = parser.parse()
+    finally:
+        shutil.rmtree(tmpdir)
+
+    assert_equal(len(asts), 2)
+    assert_equal(len(asts[0].nodes), 1)
+    assert_equal(asts[0].nodes[0].name, "A")
+    assert_equal(asts[0].nodes[0].filename, filename1)
+    assert_equal(len(asts[1].nodes), 1)
+    assert_equal(asts[1].nodes[0].name, "B")
+    assert_equal(asts[1].nodes[0].filename, filename2)
+    assert_equal(type_info.classes, {"A", "B"})
+
+
+def test_parse_multiple_files_without_include_guards():
+    tmpdir = tempfile.mkdtemp()
+    filename1 = os.path.join(tmpdir, "part1.hpp")
+    filename2 = os.path.join(tmpdir, "part2.hpp")
+    with open(filename1, "w") as f:
+        f.write("#include \"part2.hpp\"\nclass A { B b; };\n")
+    with open(filename2, "w") as f:
+        f.write("class B {};\n")
+
+    try:
+        type_info = TypeInfo()
+        parser = MultiFileParser([filename1, filename2], Includes(), type_info,
+                                 cache_dir=None)
+        asts = parser.parse()
+    finally:
+        shutil.rmtree(tmpdir)
+
+    assert_equal([ast.nodes[0].name for ast in asts], ["A", "B"])
+    assert_equal(type_info.classes, {"A", "B"})
+
+
+def test_cache_headers_without_include_guards():
+    tmpdir = tempfile.mkdtemp()
+    filename1 = os.path.join(tmpdir, "part1.hpp")
+    filename2 = os.path.join(tmpdir, "part2.hpp")
+    with open(filename1, "w") as f:
+        f.write("#include \"part2.hpp\"\nclass A { B b; };\n")
+    with open(filename2, "w") as f:
+        f.write("class B {};\n")
+    cache_dir = os.path.join(tmpdir, "cache")
+
+    def parse_with_clang(self, content):
+        raise AssertionError("Parsed '%s' again" % self.parsable_file)
+
+    parse_with_clang_backup = Parser._parse_with_clang
+    try:
+        MultiFileParser([filename1, filename2], Includes(), TypeInfo(),
+                        cache_dir=cache_dir).parse()
+        Parser._parse_with_clang = parse_with_clang
+        asts = MultiFileParser([filename1, filename2], Includes(), TypeInfo(),
+                               cache_dir=cache_dir).parse()
+    finally:
+        Parser._parse_with_clang = parse_with_clang_backup
+        shutil.rmtree(tmpdir)
+
+    assert_equal([ast.nodes[0].name for ast in asts], ["A", "B"])
+
+
+def test_parse_in_parallel():
+    tmpdir = tempfile.mkdtemp()
+    filenames = [os.path.join(tmpdir, "part%d.hpp" % i) for i in range(3)]
+    for i, filename in enumerate(filenames):
+        with open(filename, "w") as f:
+            f.write("class A%d {};" % i)
+
+    try:
+        type_info = TypeInfo()
+        asts = parse_in_parallel(filenames, Includes(), type_info,
+                                 cache_dir=None, n_jobs=2)
+    finally:
+        shutil.rmtree(tmpdir)
+
+    assert_equal(len(asts), 3)
+    for i, ast in enumerate(asts):
+        assert_equal(len(ast.nodes), 1)
+        assert_equal(ast.nodes[0].name, "A%d" % i)
+    assert_equal(type_info.classes, {"A0", "A1", "A2"})
+
+
+def test_parse_in_parallel_with_custom_config():
+    tmpdir = tempfile.mkdtemp()
+    filenames = [os.path.join(tmpdir, "part%d.hpp" % i) for i in range(2)]
+    with open(filenames[0], "w") as f:
+        f.write("template <typename T> class A {};")
+    with open(filenames[1], "w") as f:
+        f.write("class B {};")
+
+    class LocalConverter(object):
+        # cannot be pickled
+        pass
+
+    config = Config()
+    config.registered_converters.append(LocalConverter)
+    config.register_class_specialization("A", "Ad", {"T": "double"})
+
+    try:
+        type_info = TypeInfo(config)
+        parse_in_parallel(filenames, Includes(), type_info, cache_dir=None,
+                          n_jobs=2)
+    finally:
+        shutil.rmtree(tmpdir)
+
+    assert_equal(type_info.classes, {"Ad", "B"})
+
+
+def test_pickle_clang_error():
+    error = ClangError("Could not parse file correctly.", ["diagnostic"])
+    unpickled = pickle.loads(pickle.dumps(error))
+    assert_equal(str(unpickled), str(error))
@@ -1,11 +1,15 @@
 from pywrap.defaultconfig import Config
-from pywrap.template_specialization import (FunctionSpecializer,
+from pywrap.template_specialization import (Specializer, FunctionSpecializer,
                                             ClassSpecializer, MethodSpecializer)
 from pywrap.ast import Param, TemplateFunction, TemplateClass, TemplateMethod
-from nose.tools import assert_equal
+from nose.tools import assert_equal, assert_raises
 from pywrap.testing import assert_warns_message
 
 
+def test_specializer_is_abstract():
+    assert_raises(TypeError, Specializer, Config())
+
+
 def test_missing_template_specialization():
     config = Config()
     specializer = FunctionSpecializer(config)
@@ -75,3 +79,32 @@ def test_method_specialization():
     assert_equal(method.result_type, "bool")
     assert_equal(len(method.nodes), 1)
     assert_equal(method.nodes[0].tipe, "bool")
+
+
+class CountingDict(dict):
+    def __init__(self, *args, **kwargs):
+        super(CountingDict, self).__init__(*args, **kwargs)
+        self.n_lookups = 0
+
+    def __getitem__(self, key):
+        self.n_lookups += 1
+        return super(CountingDict, self).__getitem__(key)
+
+
+def test_specialize_twice():
+    config = Config()
+    config.register_class_specialization("MyClass", "MyClassDouble",
+                                         {"T": "double"})
+    config.registered_template_specializations = CountingDict(
+        config.registered_template_specializations)
+    specializer = ClassSpecializer(config)
+
+    template = TemplateClass("test.hpp", "", "MyClass")
+    template.template_types.append("T")
+
+    classes1 = specializer.specialize(template)
+    classes2 = specializer.specialize(template)
+    assert_equal(len(classes1), 1)
+    assert_equal(len(classes2), 1)
+    assert_equal(classes1[0].get_cppname(), classes2[0].get_cppname())
+    assert_equal(config.registered_template_specializations.n_lookups, 1)
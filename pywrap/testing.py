@@ -46,7 +46,7 @@ def cython_extension_from(headers, modulename=None, config=Config(),
     incdirs = full_paths(incdirs)
     filenames = _write_cython_wrapper(full_paths(headers), modulename,
                                       config, incdirs, assert_warn, warn_msg)
-    run_setup(SETUPPY_NAME, hide_errors)
+    run_setup(SETUPPY_NAME, hide_errors, in_process=True)
     try:
         yield
     finally:
@@ -64,7 +64,8 @@ def _write_cython_wrapper(filenames, modulename, config, incdirs, assert_warn,
         "target": ".",
         "incdirs": incdirs,
         "verbose": verbose,
-        "compiler_flags": ["-O0"]
+        "compiler_flags": ["-O0"],
+        "cache_dir": None
     }
     if assert_warn is None:
         results = make_cython_wrapper(**kwargs)
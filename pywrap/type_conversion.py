@@ -20,13 +20,26 @@ def is_stl_type_with_automatic_conversion(typename):
     return False
 
 
+# Maps C++ types to Cython types, the same types are converted very often
+_cython_types = {}
+_MAX_CYTHON_TYPES = 4096
+
+
 def cythontype_from_cpptype(tname):
     """Get Cython type from C++ type."""
+    cython_tname = _cython_types.get(tname)
+    if cython_tname is not None:
+        return cython_tname
+
     cython_tname = tname
     cython_tname = _remove_const_modifier(cython_tname)
     cython_tname = _remove_reference_modifier(cython_tname)
     cython_tname = _remove_namespace(cython_tname)
     cython_tname = _replace_angle_brackets(cython_tname)
+
+    if len(_cython_types) >= _MAX_CYTHON_TYPES:
+        _cython_types.clear()
+    _cython_types[tname] = cython_tname
     return cython_tname
 
 